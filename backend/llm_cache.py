@@ -0,0 +1,198 @@
+# backend/llm_cache.py
+# Exact-match response cache for Groq calls: repeat prompts (common during
+# dev iteration) skip the API entirely.
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[str]: ...
+    async def set(self, key: str, value: str) -> None: ...
+
+
+class LRUCache:
+    """In-memory LRU with per-entry TTL. Default backend for single-worker deploys."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if time.monotonic() > expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class RedisCache:
+    """Redis-backed cache for multi-worker deploys. Needs REDIS_URL set."""
+
+    def __init__(self, url: str, ttl: int = 3600):
+        import redis.asyncio as redis  # Optional dependency
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(f"llm_cache:{key}")
+
+    async def set(self, key: str, value: str) -> None:
+        await self._redis.set(f"llm_cache:{key}", value, ex=self.ttl)
+
+
+class SemanticCache:
+    """Similarity cache: near-duplicate prompts ("build a todo app" vs "make me
+    a todo list app") reuse a previous completion when cosine similarity
+    exceeds the threshold. One HNSW index per project_type, persisted to disk
+    between restarts.
+
+    Optional feature: needs fastembed + hnswlib; disabled when either is
+    missing. The embedding model loads lazily on first use, and all inference
+    and disk I/O runs in the default executor so the event loop never blocks.
+    """
+
+    # Completions append to a .jsonl on every add; the O(n) index save only
+    # happens every this-many adds (plus on load truncation, see _index_for)
+    PERSIST_EVERY = 16
+
+    def __init__(self, dim: int = 384, threshold: float = 0.92,
+                 max_elements: int = 4096, index_dir: Optional[str] = None):
+        # Availability check only; the heavy imports + ONNX model download
+        # are deferred so module import stays instant
+        self._available = (
+            importlib.util.find_spec("fastembed") is not None
+            and importlib.util.find_spec("hnswlib") is not None
+        )
+        self._model = None
+        self._hnswlib = None
+        self._lock = threading.Lock()  # hnswlib isn't safe for concurrent mutation
+        self.dim = dim
+        self.threshold = threshold
+        self.max_elements = max_elements
+        self.index_dir = index_dir or os.getenv("SEMANTIC_CACHE_DIR", ".semantic_cache")
+        self._indexes: dict = {}    # project_type -> hnswlib.Index
+        self._responses: dict = {}  # project_type -> list of completions by label
+        self._unsaved: dict = {}    # project_type -> adds since last index save
+
+    @property
+    def enabled(self) -> bool:
+        return self._available
+
+    def _ensure_model(self):
+        # Worker-thread only: first call downloads/loads the embedding model
+        if self._model is None:
+            import hnswlib
+            from fastembed import TextEmbedding
+            self._hnswlib = hnswlib
+            self._model = TextEmbedding("BAAI/bge-small-en-v1.5")
+
+    def _embed(self, text: str):
+        return next(iter(self._model.embed([text])))
+
+    def _paths(self, project_type: str):
+        return (
+            os.path.join(self.index_dir, f"{project_type}.hnsw"),
+            os.path.join(self.index_dir, f"{project_type}.jsonl"),
+        )
+
+    def _index_for(self, project_type: str):
+        index = self._indexes.get(project_type)
+        if index is None:
+            index = self._hnswlib.Index(space="cosine", dim=self.dim)
+            index_path, responses_path = self._paths(project_type)
+            if os.path.exists(index_path) and os.path.exists(responses_path):
+                index.load_index(index_path, max_elements=self.max_elements)
+                with open(responses_path) as f:
+                    responses = [json.loads(line) for line in f if line.strip()]
+                # The responses log may run ahead of the periodically-saved
+                # index; entries without a vector are unreachable, drop them —
+                # from the file too, or future appends would land at lines
+                # that no longer match their labels and hits would return the
+                # wrong completion
+                kept = responses[:index.get_current_count()]
+                if len(kept) < len(responses):
+                    with open(responses_path, "w") as f:
+                        for response in kept:
+                            f.write(json.dumps(response) + "\n")
+                self._responses[project_type] = kept
+            else:
+                index.init_index(max_elements=self.max_elements, ef_construction=200, M=16)
+                self._responses[project_type] = []
+            self._indexes[project_type] = index
+            self._unsaved[project_type] = 0
+        return index
+
+    async def get(self, project_type: str, prompt: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get_sync, project_type, prompt)
+
+    def _get_sync(self, project_type: str, prompt: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_model()
+            index = self._index_for(project_type)
+            if index.get_current_count() == 0:
+                return None
+            labels, distances = index.knn_query(self._embed(prompt), k=1)
+            if 1 - distances[0][0] > self.threshold:
+                return self._responses[project_type][labels[0][0]]
+            return None
+
+    async def add(self, project_type: str, prompt: str, response: str):
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._add_sync, project_type, prompt, response)
+
+    def _add_sync(self, project_type: str, prompt: str, response: str):
+        with self._lock:
+            self._ensure_model()
+            index = self._index_for(project_type)
+            label = index.get_current_count()
+            if label >= self.max_elements:
+                return
+            index.add_items([self._embed(prompt)], [label])
+            self._responses[project_type].append(response)
+
+            os.makedirs(self.index_dir, exist_ok=True)
+            index_path, responses_path = self._paths(project_type)
+            with open(responses_path, "a") as f:
+                f.write(json.dumps(response) + "\n")
+            self._unsaved[project_type] += 1
+            if self._unsaved[project_type] >= self.PERSIST_EVERY:
+                index.save_index(index_path)
+                self._unsaved[project_type] = 0
+
+
+def request_key(model: str, messages: list, temperature: float) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def default_cache() -> CacheBackend:
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisCache(redis_url)
+    return LRUCache()
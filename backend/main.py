@@ -1,17 +1,28 @@
 # backend/main.py
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from supabase import create_client, Client
 from groq import Groq
-from e2b_code_interpreter import Sandbox
+import asyncpg
+import httpx
 import os
 import asyncio
-import uuid
+import re
+from collections import deque
 from typing import Dict, List
 import json
+import orjson
 
-app = FastAPI(title="xAppBuilder Backend")
+from cachetools import TTLCache
+
+from llm_cache import SemanticCache, default_cache, request_key
+from sandbox_pool import SandboxPool
+
+# orjson serializes responses (notably the /projects row lists) in C, 2-5x
+# faster than the default json.dumps
+app = FastAPI(title="xAppBuilder Backend", default_response_class=ORJSONResponse)
 
 # CORS for frontend (Next.js on Vercel/localhost)
 app.add_middleware(
@@ -27,34 +38,198 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 E2B_API_KEY = os.getenv("E2B_API_KEY")
+# Supavisor transaction-mode pooler URL (port 6543 on Supabase)
+SUPAVISOR_URL = os.getenv("SUPAVISOR_URL")
 
+# supabase-py client is kept for auth only; hot DB paths go through asyncpg
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
+
+# Shared keep-alive HTTP client so Groq calls reuse warm TCP+TLS connections
+# instead of paying a fresh handshake per request
+shared_http = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+    timeout=30,
+)
+groq_client = Groq(api_key=GROQ_API_KEY, http_client=shared_http)
+
+@app.on_event("shutdown")
+async def close_shared_http():
+    shared_http.close()
+
+# Shared Postgres pool: true async, no PostgREST hop, no per-request handshake
+pg_pool: asyncpg.Pool = None
+
+@app.on_event("startup")
+async def create_pg_pool():
+    global pg_pool
+    # statement_cache_size must be 0 behind Supavisor/pgbouncer in txn mode
+    pg_pool = await asyncpg.create_pool(
+        SUPAVISOR_URL, min_size=2, max_size=10, statement_cache_size=0
+    )
+
+@app.on_event("shutdown")
+async def close_pg_pool():
+    if pg_pool is not None:
+        await pg_pool.close()
+
+# Exact-match cache over Groq completions (in-memory LRU, Redis if REDIS_URL set)
+llm_cache = default_cache()
+# Similarity cache for near-duplicate prompts (no-op unless fastembed/hnswlib installed)
+semantic_cache = SemanticCache()
+
+# Warm E2B sandboxes, checked out per build instead of cold-starting each time
+sandbox_pool = SandboxPool(api_key=E2B_API_KEY)
+
+@app.on_event("startup")
+async def start_sandbox_pool():
+    sandbox_pool.start()
+
+@app.on_event("shutdown")
+async def stop_sandbox_pool():
+    await sandbox_pool.shutdown()
+
+# One queue + relay task per websocket so a slow client only backs up its own
+# queue instead of stalling broadcast() (and the build task behind it).
+class Channel:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        self.relay_task: asyncio.Task = None
 
 # Simple in-memory connection manager for WebSockets (per project)
 class ConnectionManager:
+    # Window for coalescing adjacent log lines into one websocket frame.
+    FLUSH_INTERVAL = 0.02
+    # Frames a project may emit per dispatcher turn before yielding to the
+    # next project (deficit round robin: a token-streaming build can't starve
+    # quieter ones of event-loop time).
+    DISPATCH_BATCH = 8
+
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Sets give O(1) add/discard; Channel hashes by identity
+        self.active_connections: Dict[str, set] = {}
+        self._by_websocket: Dict[WebSocket, Channel] = {}
+        self._prefix: Dict[str, bytes] = {}  # Precomputed log-envelope prefixes
+        self._pending: Dict[str, List[str]] = {}
+        self._flush_handle: Dict[str, asyncio.TimerHandle] = {}
+        self._project_frames: Dict[str, deque] = {}
+        self._ready: deque = deque()  # Round-robin order of projects with frames
+        self._ready_set: set = set()
+        self._dispatch_event = asyncio.Event()
+        self._dispatcher_task: asyncio.Task = None
 
     async def connect(self, project_id: str, websocket: WebSocket):
         await websocket.accept()
-        if project_id not in self.active_connections:
-            self.active_connections[project_id] = []
-        self.active_connections[project_id].append(websocket)
+        channel = Channel(websocket)
+        channel.relay_task = asyncio.create_task(self._relay(project_id, channel))
+        self.active_connections.setdefault(project_id, set()).add(channel)
+        self._by_websocket[websocket] = channel
 
     def disconnect(self, project_id: str, websocket: WebSocket):
-        if project_id in self.active_connections:
-            self.active_connections[project_id].remove(websocket)
-            if not self.active_connections[project_id]:
+        channel = self._by_websocket.pop(websocket, None)
+        if channel is None:
+            return
+        channel.relay_task.cancel()
+        bucket = self.active_connections.get(project_id)
+        if bucket is not None:
+            bucket.discard(channel)
+            if not bucket:
                 del self.active_connections[project_id]
+                self._prefix.pop(project_id, None)
+
+    async def _relay(self, project_id: str, channel: Channel):
+        # Drains this connection's own queue; producers never await the socket.
+        # Frames arrive pre-encoded, so K subscribers share one encode.
+        try:
+            while True:
+                frame = await channel.queue.get()
+                await channel.websocket.send_bytes(frame)
+        except (WebSocketDisconnect, RuntimeError):
+            self.disconnect(project_id, channel.websocket)
+        except asyncio.CancelledError:
+            pass
 
     async def broadcast(self, project_id: str, message: str):
+        # No subscribers, nothing to do — builds run via POST without a
+        # websocket attached, and project_id is caller-supplied, so buffering
+        # (or caching a prefix) for them would grow without bound
+        if project_id not in self.active_connections:
+            return
+        # Buffer and flush on a short timer so chatty bursts (build logs,
+        # streamed tokens) become one frame instead of ten.
+        self._pending.setdefault(project_id, []).append(message)
+        if project_id not in self._flush_handle:
+            loop = asyncio.get_running_loop()
+            self._flush_handle[project_id] = loop.call_later(
+                self.FLUSH_INTERVAL, self._flush, project_id
+            )
+
+    async def broadcast_now(self, project_id: str, message: str):
+        # Bypass coalescing for markers that must go out immediately.
+        if project_id not in self.active_connections:
+            return
+        self._pending.setdefault(project_id, []).append(message)
+        self._flush(project_id)
+
+    def _flush(self, project_id: str):
+        handle = self._flush_handle.pop(project_id, None)
+        if handle is not None:
+            handle.cancel()
+        messages = self._pending.pop(project_id, None)
+        # The last subscriber may have left inside the flush window; drop the
+        # batch rather than build frames (and a prefix) nobody will read
+        if not messages or project_id not in self.active_connections:
+            return
+        # Wrap the batch in a {"type":"log","project_id":...,"msg":...} frame
+        # without a full JSON tree walk: the constant part is precomputed per
+        # project, so only msg pays for escaping. Encoded once here, fanned out
+        # as binary frames to every subscriber.
+        prefix = self._prefix.get(project_id)
+        if prefix is None:
+            prefix = orjson.dumps({"type": "log", "project_id": project_id})[:-1] + b',"msg":'
+            self._prefix[project_id] = prefix
+        frame = prefix + orjson.dumps("".join(messages)) + b"}"
+        self._project_frames.setdefault(project_id, deque()).append(frame)
+        if project_id not in self._ready_set:
+            self._ready_set.add(project_id)
+            self._ready.append(project_id)
+        if self._dispatcher_task is None:
+            self._dispatcher_task = asyncio.ensure_future(self._dispatch())
+        self._dispatch_event.set()
+
+    async def _dispatch(self):
+        # Single global send loop: each turn drains up to DISPATCH_BATCH frames
+        # from one project, then rotates it to the tail
+        while True:
+            if not self._ready:
+                self._dispatch_event.clear()
+                await self._dispatch_event.wait()
+                continue
+            project_id = self._ready.popleft()
+            frames = self._project_frames.get(project_id)
+            if frames:
+                for _ in range(min(self.DISPATCH_BATCH, len(frames))):
+                    self._enqueue(project_id, frames.popleft())
+            if frames:
+                self._ready.append(project_id)  # Still has a backlog; rotate
+            else:
+                self._ready_set.discard(project_id)
+                self._project_frames.pop(project_id, None)
+            await asyncio.sleep(0)  # Let relay tasks run between turns
+
+    def _enqueue(self, project_id: str, frame: bytes):
         if project_id in self.active_connections:
-            for connection in self.active_connections[project_id][:]:
+            # Copy: a relay hitting a dead socket may disconnect() mid-loop
+            for channel in list(self.active_connections[project_id]):
                 try:
-                    await connection.send_text(message)
-                except WebSocketDisconnect:
-                    self.disconnect(project_id, connection)
+                    channel.queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    # Slow consumer: drop its oldest message rather than block.
+                    try:
+                        channel.queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        pass
+                    channel.queue.put_nowait(frame)
 
 manager = ConnectionManager()
 
@@ -74,49 +249,81 @@ class ProjectCreate(BaseModel):
 class BuildRequest(BaseModel):
     prompt: str
     project_type: str = "flutter"  # "flutter" or "godot" for MVP
+    cacheable: bool = False  # Opt-in: serve repeat prompts from the LLM cache
 
-# Basic auth routes using Supabase
+# Basic auth routes using Supabase. supabase-py's auth calls are synchronous
+# HTTP, so they run in the default executor to keep the event loop free (until
+# a move to the SDK's AsyncClient).
 @app.post("/auth/signup")
 async def signup(user: UserCreate):
+    loop = asyncio.get_running_loop()
     try:
-        response = supabase.auth.sign_up({"email": user.email, "password": user.password})
+        response = await loop.run_in_executor(
+            None, lambda: supabase.auth.sign_up({"email": user.email, "password": user.password})
+        )
         return response
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/auth/login")
 async def login(user: UserLogin):
+    loop = asyncio.get_running_loop()
     try:
-        response = supabase.auth.sign_in_with_password({"email": user.email, "password": user.password})
+        response = await loop.run_in_executor(
+            None, lambda: supabase.auth.sign_in_with_password({"email": user.email, "password": user.password})
+        )
         return {"access_token": response.session.access_token, "user": response.user}
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.post("/auth/logout")
 async def logout():
-    supabase.auth.sign_out()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, supabase.auth.sign_out)
     return {"message": "Logged out"}
 
-# Project routes 
+# Project routes
+# Short TTL cache for dashboard polling; keyed by a singleton until auth is
+# wired (then key by user_id, or Redis SETEX when running multiple workers)
+project_list_cache = TTLCache(maxsize=1024, ttl=30)
+_PROJECT_LIST_KEY = "all"
+
+# Internal bulk path: one INSERT round trip for N rows. POST /projects routes
+# through it with a single-element list so a future POST /projects/batch
+# endpoint reuses the same code.
+async def create_projects_bulk(projects: List[ProjectCreate]) -> List[dict]:
+    names = [p.name for p in projects]
+    descriptions = [p.description or None for p in projects]  # Handle empty
+    async with pg_pool.acquire() as con:
+        rows = await con.fetch(
+            "INSERT INTO projects (name, description) "
+            "SELECT * FROM unnest($1::text[], $2::text[]) RETURNING *",
+            names,
+            descriptions,
+        )
+    project_list_cache.pop(_PROJECT_LIST_KEY, None)  # Bust stale listing
+    return [dict(row) for row in rows]
+
 @app.post("/projects")
 async def create_project(project: ProjectCreate):
     try:
-        data = supabase.table("projects").insert({
-            "name": project.name,
-            "description": project.description or None,  # Handle empty
-        }).execute()
-        if not data.data:
-            raise HTTPException(status_code=400, detail="Insert failed: no data returned")
-        return data.data[0]
+        rows = await create_projects_bulk([project])
+        return rows[0]
     except Exception as e:
         # Log full error + return detail for debugging
         print(f"Project insert error: {str(e)}")  # Shows in Render logs
         raise HTTPException(status_code=500, detail=f"DB Error: {str(e)}")
-        
+
 @app.get("/projects")
 async def list_projects():
-    data = supabase.table("projects").select("*").execute()
-    return data.data
+    cached = project_list_cache.get(_PROJECT_LIST_KEY)
+    if cached is not None:
+        return cached
+    async with pg_pool.acquire() as con:
+        rows = await con.fetch("SELECT * FROM projects")
+    projects = [dict(row) for row in rows]
+    project_list_cache[_PROJECT_LIST_KEY] = projects
+    return projects
 
 # WebSocket for live terminal streaming
 @app.websocket("/ws/build/{project_id}")
@@ -130,47 +337,22 @@ async def websocket_endpoint(websocket: WebSocket, project_id: str):
     except WebSocketDisconnect:
         manager.disconnect(project_id, websocket)
 
-# Background build task
-async def run_build_task(project_id: str, prompt: str, project_type: str = "flutter"):
-    await manager.broadcast(project_id, "🚀 Starting build...\n")
-    
-    try:
-        # Start E2B sandbox
-        with Sandbox(api_key=E2B_API_KEY) as sandbox:
-            await manager.broadcast(project_id, "Sandbox started\n")
-            
-            # Simple agent prompt to Groq
-            system_prompt = f"""
-            You are an expert {project_type} developer. Generate a complete, working project based on this description:
-            {prompt}
-            
-            Use best practices. Output only the code files with paths.
-            For Flutter: create lib/main.dart and other necessary files.
-            For Godot: create project.godot, scenes, and scripts.
-            """
-            
-            await manager.broadcast(project_id, "Generating code with Groq...\n")
-            
-            chat_completion = groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama3-70b-8192",  # Fast and capable
-                temperature=0.7,
-            )
-            
-            generated_code = chat_completion.choices[0].message.content
-            await manager.broadcast(project_id, f"Generated:\n{generated_code}\n")
-            
-            # In real agent, parse and write files to sandbox
-            # For MVP demo: just echo
-            await manager.broadcast(project_id, "Writing files to sandbox...\n")
-            
-            # Example: write a simple main.dart for Flutter
-            if project_type == "flutter":
-                sandbox.files.write("/home/user/app/lib/main.dart", """
-import 'package:flutter/material.dart';
+# System prompts are byte-identical across calls so the provider's KV-prefix
+# cache can reuse the shared prefix; all per-request text goes in the user turn.
+SYSTEM_PROMPT_FLUTTER = """You are an expert Flutter developer. Generate a complete, working project based on the user's description.
+
+Use best practices. Output only the code files with paths.
+Create lib/main.dart and other necessary files."""
+
+SYSTEM_PROMPT_GODOT = """You are an expert Godot developer. Generate a complete, working project based on the user's description.
+
+Use best practices. Output only the code files with paths.
+Create project.godot, scenes, and scripts."""
+
+# Demo Flutter boilerplate, pre-encoded once at import so each build hands the
+# sandbox a ready buffer (swap for a precompiled jinja2.Template when this
+# needs real templating)
+_MAIN_DART_BYTES: bytes = b"""import 'package:flutter/material.dart';
 
 void main() => runApp(MyApp());
 
@@ -185,355 +367,126 @@ class MyApp extends StatelessWidget {
     );
   }
 }
-                """)
-                await manager.broadcast(project_id, "Wrote main.dart\n")
-            
-            # Run preview/build commands
-            await manager.broadcast(project_id, "Running flutter build web...\n")
-            process = await sandbox.process.start("flutter build web")
-            await process
-            await manager.broadcast(project_id, f"Build complete! Preview at sandbox URL\n")
-            
-            # Store artifact link, etc.
-            
-    except Exception as e:
-        await manager.broadcast(project_id, f"Error: {str(e)}\n")
-    
-    await manager.broadcast(project_id, "Build finished.\n")
-
-@app.post("/projects/{project_id}/build")
-async def start_build(project_id: str, request: BuildRequest, background_tasks: BackgroundTasks):
-    # In production: verify project ownership
-    background_tasks.add_task(run_build_task, project_id, request.prompt, request.project_type)
-    return {"message": "Build started", "project_id": project_id}
-
-@app.get("/")
-async def root():
-    return {"message": "xAppBuilder Backend Running"}    raise RuntimeError("Missing env vars")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
-
-# WebSocket manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, project_id: str, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.setdefault(project_id, []).append(websocket)
-
-    def disconnect(self, project_id: str, websocket: WebSocket):
-        if project_id in self.active_connections:
-            self.active_connections[project_id].remove(websocket)
-            if not self.active_connections[project_id]:
-                del self.active_connections[project_id]
-
-    async def broadcast(self, project_id: str, message: str):
-        if project_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[project_id]:
-                try:
-                    await connection.send_text(message)
-                except WebSocketDisconnect:
-                    disconnected.append(connection)
-            for conn in disconnected:
-                self.disconnect(project_id, conn)
-
-manager = ConnectionManager()
-
-# Models
-class UserCreate(BaseModel):
-    email: str
-    password: str
-
-class UserLogin(BaseModel):
-    email: str
-    password: str
+"""
+
+# Cache-aware Groq generation; broadcasts progress and streamed tokens
+async def _groq_generate(project_id: str, prompt: str, project_type: str, cacheable: bool) -> str:
+    system_prompt = SYSTEM_PROMPT_GODOT if project_type == "godot" else SYSTEM_PROMPT_FLUTTER
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ]
+    model = "llama3-70b-8192"  # Fast and capable
+    temperature = 0.7
+
+    # Exact-match cache: only safe when sampling is deterministic or opted in
+    use_cache = cacheable or temperature == 0
+    cache_key = request_key(model, messages, temperature)
+    generated_code = await llm_cache.get(cache_key) if use_cache else None
+
+    if generated_code is None and use_cache:
+        # Near-duplicate prompt? Embedding lookup is far cheaper than a
+        # 70B generation.
+        generated_code = await semantic_cache.get(project_type, prompt)
+
+    if generated_code is not None:
+        await manager.broadcast(project_id, "Using cached generation\n")
+        await manager.broadcast(project_id, f"Generated:\n{generated_code}\n")
+    else:
+        await manager.broadcast(project_id, "Generating code with Groq...\n")
+        await manager.broadcast(project_id, "Generated:\n")
+
+        loop = asyncio.get_running_loop()
+
+        def _consume_stream() -> str:
+            # The Groq SDK is synchronous, so the stream is drained in a
+            # worker thread; each delta hops back to the loop for broadcast.
+            # Streaming keeps time to first visible token at ~100ms.
+            stream = groq_client.chat.completions.create(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                stream=True,
+            )
+            parts = []  # Keep the full text for file parsing + the caches
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    asyncio.run_coroutine_threadsafe(
+                        manager.broadcast(project_id, delta), loop
+                    )
+            return "".join(parts)
 
-class ProjectCreate(BaseModel):
-    name: str
-    description: str = ""
+        generated_code = await loop.run_in_executor(None, _consume_stream)
+        await manager.broadcast(project_id, "\n")
 
-class BuildRequest(BaseModel):
-    prompt: str
-    project_type: str = "flutter"  # "flutter" or "godot"
+        if use_cache:
+            await llm_cache.set(cache_key, generated_code)
+            await semantic_cache.add(project_type, prompt, generated_code)
 
-# Auth routes (with better error handling)
-@app.post("/auth/signup")
-async def signup(user: UserCreate):
-    try:
-        response = supabase.auth.sign_up({"email": user.email, "password": user.password})
-        return response
-    except Exception as e:
-        logger.error(f"Signup error: {str(e)}")
-        raise HTTPException(status_code=400, detail=f"Signup failed: {str(e)}")
+    return generated_code
 
-@app.post("/auth/login")
-async def login(user: UserLogin):
-    try:
-        response = supabase.auth.sign_in_with_password({"email": user.email, "password": user.password})
-        return {"access_token": response.session.access_token, "user": response.user}
-    except Exception as e:
-        logger.error(f"Login error: {str(e)}")
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-
-# Projects (improved error handling)
-@app.post("/projects")
-async def create_project(project: ProjectCreate):
-    try:
-        data = supabase.table("projects").insert({
-            "name": project.name,
-            "description": project.description or None,
-        }).execute()
-        if not data.data:
-            raise ValueError("No data returned from insert")
-        return data.data[0]
-    except Exception as e:
-        logger.error(f"Create project error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to create project: {str(e)}")
-
-@app.get("/projects")
-async def list_projects():
-    try:
-        data = supabase.table("projects").select("*").execute()
-        return data.data
-    except Exception as e:
-        logger.error(f"List projects error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to list projects: {str(e)}")
-
-# WebSocket
-@app.websocket("/ws/build/{project_id}")
-async def websocket_endpoint(websocket: WebSocket, project_id: str):
-    await manager.connect(project_id, websocket)
-    try:
-        while True:
-            await websocket.receive_text()  # Keep alive / future iteration messages
-    except WebSocketDisconnect:
-        manager.disconnect(project_id, websocket)
+# Background build task
+async def run_build_task(project_id: str, prompt: str, project_type: str = "flutter", cacheable: bool = False):
+    await manager.broadcast(project_id, "🚀 Starting build...\n")
 
-# Improved build task with robust error handling
-async def run_build_task(project_id: str, prompt: str, project_type: str = "flutter"):
-    await manager.broadcast(project_id, "🚀 Starting AI build...\n")
-    
     sandbox = None
     try:
-        await manager.broadcast(project_id, "Initializing E2B sandbox...\n")
-        sandbox = Sandbox(api_key=E2B_API_KEY)
-        await manager.broadcast(project_id, "✅ Sandbox ready\n")
-
-        await manager.broadcast(project_id, "Generating code with Groq...\n")
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": f"You are an expert {project_type} developer. Generate a complete project."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama3-70b-8192",
-            temperature=0.7,
-        )
-        generated = chat_completion.choices[0].message.content
-        await manager.broadcast(project_id, f"Generated code:\n{generated[:1000]}...\n")  # Truncate for stream
-
-        # Demo file write (expand with real parsing later)
+        # Sandbox checkout and code generation are independent I/O; overlap
+        # them instead of paying for both serially
+        sandbox_task = asyncio.create_task(sandbox_pool.acquire())
+        gen_task = asyncio.create_task(_groq_generate(project_id, prompt, project_type, cacheable))
+        try:
+            sandbox, generated_code = await asyncio.gather(sandbox_task, gen_task)
+        except Exception:
+            # Cancel the survivor; recycle the sandbox if it already landed
+            gen_task.cancel()
+            sandbox_task.cancel()
+            if sandbox_task.done() and not sandbox_task.cancelled() and sandbox_task.exception() is None:
+                sandbox = sandbox_task.result()
+            raise
+        await manager.broadcast(project_id, "Sandbox started\n")
+
+        # In real agent, parse and write files to sandbox
+        # For MVP demo: just echo
+        await manager.broadcast(project_id, "Writing files to sandbox...\n")
+
+        # Example: write a simple main.dart for Flutter
         if project_type == "flutter":
-            await sandbox.files.write("/home/user/app/lib/main.dart", "import 'package:flutter/material.dart';\n\nvoid main() => runApp(MyApp());\n\nclass MyApp extends StatelessWidget {\n  @override\n  Widget build(BuildContext context) {\n    return MaterialApp(home: Scaffold(body: Center(child: Text('AI-Built App!'))));\n  }\n}")
+            sandbox.files.write("/home/user/app/lib/main.dart", _MAIN_DART_BYTES)
             await manager.broadcast(project_id, "Wrote main.dart\n")
 
-        await manager.broadcast(project_id, "Build complete! Preview/artifacts coming soon.\n")
-
-    except Exception as e:
-        error_msg = f"Build failed: {str(e)}"
-        logger.error(error_msg)
-        await manager.broadcast(project_id, f"❌ {error_msg}\n")
-    finally:
-        if sandbox:
-            try:
-                sandbox.close()
-                await manager.broadcast(project_id, "Sandbox closed\n")
-            except:
-                pass
-        await manager.broadcast(project_id, "Build process finished.\n")
-
-@app.post("/projects/{project_id}/build")
-async def start_build(project_id: str, request: BuildRequest, background_tasks: BackgroundTasks):
-    if not uuid.UUID(project_id, version=4):  # Basic validation
-        raise HTTPException(status_code=400, detail="Invalid project ID")
-    background_tasks.add_task(run_build_task, project_id, request.prompt, request.project_type)
-    return {"message": "Build started successfully"}
-
-@app.get("/")
-async def root():
-    return {"message": "xAppBuilder Backend Running"}        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, project_id: str, websocket: WebSocket):
-        await websocket.accept()
-        if project_id not in self.active_connections:
-            self.active_connections[project_id] = []
-        self.active_connections[project_id].append(websocket)
-
-    def disconnect(self, project_id: str, websocket: WebSocket):
-        if project_id in self.active_connections:
-            self.active_connections[project_id].remove(websocket)
-            if not self.active_connections[project_id]:
-                del self.active_connections[project_id]
-
-    async def broadcast(self, project_id: str, message: str):
-        if project_id in self.active_connections:
-            for connection in self.active_connections[project_id][:]:
-                try:
-                    await connection.send_text(message)
-                except WebSocketDisconnect:
-                    self.disconnect(project_id, connection)
-
-manager = ConnectionManager()
-
-# Pydantic models
-class UserCreate(BaseModel):
-    email: str
-    password: str
-
-class UserLogin(BaseModel):
-    email: str
-    password: str
-
-class ProjectCreate(BaseModel):
-    name: str
-    description: str = ""
-
-class BuildRequest(BaseModel):
-    prompt: str
-    project_type: str = "flutter"  # "flutter" or "godot" for MVP
-
-# Basic auth routes using Supabase
-@app.post("/auth/signup")
-async def signup(user: UserCreate):
-    try:
-        response = supabase.auth.sign_up({"email": user.email, "password": user.password})
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-@app.post("/auth/login")
-async def login(user: UserLogin):
-    try:
-        response = supabase.auth.sign_in_with_password({"email": user.email, "password": user.password})
-        return {"access_token": response.session.access_token, "user": response.user}
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+        # Run preview/build commands
+        await manager.broadcast(project_id, "Running flutter build web...\n")
+        process = await sandbox.process.start("flutter build web")
+        await process
+        await manager.broadcast(project_id, f"Build complete! Preview at sandbox URL\n")
 
-@app.post("/auth/logout")
-async def logout():
-    supabase.auth.sign_out()
-    return {"message": "Logged out"}
+        # Store artifact link, etc.
 
-# Project routes 
-@app.post("/projects")
-async def create_project(project: ProjectCreate):
-    try:
-        data = supabase.table("projects").insert({
-            "name": project.name,
-            "description": project.description or None,  # Handle empty
-        }).execute()
-        if not data.data:
-            raise HTTPException(status_code=400, detail="Insert failed: no data returned")
-        return data.data[0]
     except Exception as e:
-        # Log full error + return detail for debugging
-        print(f"Project insert error: {str(e)}")  # Shows in Render logs
-        raise HTTPException(status_code=500, detail=f"DB Error: {str(e)}")
-        
-@app.get("/projects")
-async def list_projects():
-    data = supabase.table("projects").select("*").execute()
-    return data.data
-
-# WebSocket for live terminal streaming
-@app.websocket("/ws/build/{project_id}")
-async def websocket_endpoint(websocket: WebSocket, project_id: str):
-    await manager.connect(project_id, websocket)
-    try:
-        while True:
-            data = await websocket.receive_text()
-            # Optional: handle incoming messages (e.g., iteration prompts)
-            await manager.broadcast(project_id, f"Client: {data}")
-    except WebSocketDisconnect:
-        manager.disconnect(project_id, websocket)
-
-# Background build task
-async def run_build_task(project_id: str, prompt: str, project_type: str = "flutter"):
-    await manager.broadcast(project_id, "🚀 Starting build...\n")
-    
-    try:
-        # Start E2B sandbox
-        with Sandbox(api_key=E2B_API_KEY) as sandbox:
-            await manager.broadcast(project_id, "Sandbox started\n")
-            
-            # Simple agent prompt to Groq
-            system_prompt = f"""
-            You are an expert {project_type} developer. Generate a complete, working project based on this description:
-            {prompt}
-            
-            Use best practices. Output only the code files with paths.
-            For Flutter: create lib/main.dart and other necessary files.
-            For Godot: create project.godot, scenes, and scripts.
-            """
-            
-            await manager.broadcast(project_id, "Generating code with Groq...\n")
-            
-            chat_completion = groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama3-70b-8192",  # Fast and capable
-                temperature=0.7,
-            )
-            
-            generated_code = chat_completion.choices[0].message.content
-            await manager.broadcast(project_id, f"Generated:\n{generated_code}\n")
-            
-            # In real agent, parse and write files to sandbox
-            # For MVP demo: just echo
-            await manager.broadcast(project_id, "Writing files to sandbox...\n")
-            
-            # Example: write a simple main.dart for Flutter
-            if project_type == "flutter":
-                sandbox.files.write("/home/user/app/lib/main.dart", """
-import 'package:flutter/material.dart';
+        await manager.broadcast(project_id, f"Error: {str(e)}\n")
+    finally:
+        if sandbox is not None:
+            # Reset + return to the pool (or close if the pool is full)
+            await sandbox_pool.release(sandbox)
 
-void main() => runApp(MyApp());
+    await manager.broadcast_now(project_id, "Build finished.\n")
 
-class MyApp extends StatelessWidget {
-  @override
-  Widget build(BuildContext context) {
-    return MaterialApp(
-      home: Scaffold(
-        appBar: AppBar(title: Text('xAppBuilder MVP')),
-        body: Center(child: Text('Hello from AI-built app!')),
-      ),
-    );
-  }
-}
-                """)
-                await manager.broadcast(project_id, "Wrote main.dart\n")
-            
-            # Run preview/build commands
-            await manager.broadcast(project_id, "Running flutter build web...\n")
-            process = await sandbox.process.start("flutter build web")
-            await process
-            await manager.broadcast(project_id, f"Build complete! Preview at sandbox URL\n")
-            
-            # Store artifact link, etc.
-            
-    except Exception as e:
-        await manager.broadcast(project_id, f"Error: {str(e)}\n")
-    
-    await manager.broadcast(project_id, "Build finished.\n")
+# UUIDv4 check without allocating a uuid.UUID (whose ValueError would surface
+# as a 500); no exception on the happy path
+_UUID_RE = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}\Z", re.I
+)
 
 @app.post("/projects/{project_id}/build")
 async def start_build(project_id: str, request: BuildRequest, background_tasks: BackgroundTasks):
+    if not _UUID_RE.match(project_id):
+        raise HTTPException(status_code=400, detail="Invalid project ID")
     # In production: verify project ownership
-    background_tasks.add_task(run_build_task, project_id, request.prompt, request.project_type)
+    background_tasks.add_task(run_build_task, project_id, request.prompt, request.project_type, request.cacheable)
     return {"message": "Build started", "project_id": project_id}
 
 @app.get("/")
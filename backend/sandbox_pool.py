@@ -0,0 +1,99 @@
+# backend/sandbox_pool.py
+# Pool of pre-warmed E2B sandboxes so builds skip the cold-start cost
+# (container boot + Flutter SDK image pull) that dominates small builds.
+import asyncio
+import os
+
+from e2b_code_interpreter import Sandbox
+
+
+class SandboxPool:
+    def __init__(self, api_key: str, min_idle: int = 2, max_size: int = None):
+        self.api_key = api_key
+        self.min_idle = min_idle
+        self.max_size = max_size or int(os.getenv("SANDBOX_POOL_SIZE", "4"))
+        self._idle: asyncio.Queue = asyncio.Queue(maxsize=self.max_size)
+        self._warmer_task: asyncio.Task = None
+        self._closing = False
+
+    def start(self):
+        # Call from app startup (needs a running event loop)
+        if self._warmer_task is None:
+            self._warmer_task = asyncio.create_task(self._keep_warm())
+
+    async def _keep_warm(self):
+        # Background top-up so an idle sandbox is usually ready at acquire()
+        while True:
+            try:
+                if self._idle.qsize() < self.min_idle:
+                    sandbox = await self._create()
+                    try:
+                        # put_nowait: an awaited put could be cancelled while
+                        # holding a live sandbox
+                        self._idle.put_nowait(sandbox)
+                    except asyncio.QueueFull:
+                        await self._close(sandbox)
+                else:
+                    await asyncio.sleep(1)
+            except Exception:
+                await asyncio.sleep(5)  # E2B hiccup; retry later
+
+    async def _create(self) -> Sandbox:
+        # Sandbox() blocks on container boot; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, lambda: Sandbox(api_key=self.api_key))
+        try:
+            # shield: cancelling the awaiter must not cancel the future, or
+            # the eventual result would be discarded before salvage sees it
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker thread can't be stopped and will finish booting a
+            # billed VM regardless; salvage it into the pool (or close it)
+            # once it lands instead of orphaning it
+            future.add_done_callback(self._salvage)
+            raise
+
+    def _salvage(self, future):
+        # Done-callback for a create whose awaiter was cancelled; runs on the
+        # event loop after the worker thread finishes
+        if future.cancelled() or future.exception() is not None:
+            return
+        sandbox = future.result()
+        if not self._closing:
+            try:
+                self._idle.put_nowait(sandbox)
+                return
+            except asyncio.QueueFull:
+                pass
+        asyncio.ensure_future(self._close(sandbox))
+
+    async def acquire(self) -> Sandbox:
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            return await self._create()
+
+    async def release(self, sandbox: Sandbox):
+        try:
+            # Reset state so the next build starts from a clean tree
+            process = await sandbox.process.start("rm -rf /home/user/app/*")
+            await process
+            self._idle.put_nowait(sandbox)
+        except Exception:
+            # Reset failed or pool is full: don't recycle, just close
+            await self._close(sandbox)
+
+    async def shutdown(self):
+        self._closing = True  # Makes late salvaged creates close, not pool
+        if self._warmer_task is not None:
+            self._warmer_task.cancel()
+            self._warmer_task = None
+        while not self._idle.empty():
+            await self._close(self._idle.get_nowait())
+
+    async def _close(self, sandbox: Sandbox):
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, sandbox.close)
+        except Exception:
+            pass